@@ -0,0 +1,52 @@
+# packages/core/src/kernel/python/__tests__/test_dataframe_formatter.py
+import contextlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The kernel modules are loaded as the `python` package from src/kernel
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from python.dataframe_formatter import format_dataframe  # noqa: E402
+
+
+def _frame_with_missing_strings():
+    return pd.DataFrame({
+        'name': pd.Series(['a', np.nan, 'c'], dtype=object),
+        'label': pd.Series(['x', None, 'z'], dtype='string'),
+    })
+
+
+def test_format_dataframe_leaves_source_frame_unchanged():
+    df = _frame_with_missing_strings()
+    expected = df.copy()
+
+    result = format_dataframe(df)
+
+    assert [row['name'] for row in result['pageData']] == ['a', None, 'c']
+    assert [row['label'] for row in result['pageData']] == ['x', None, 'z']
+    pd.testing.assert_frame_equal(df, expected)
+    assert df['name'].iloc[1] is np.nan
+    assert df['label'].iloc[1] is pd.NA
+
+
+def test_format_dataframe_with_copy_on_write():
+    # Copy-on-Write is always on from pandas 3.0 and opt-in before that
+    if int(pd.__version__.split('.')[0]) >= 3:
+        copy_on_write = contextlib.nullcontext()
+    elif hasattr(pd.options.mode, 'copy_on_write'):
+        copy_on_write = pd.option_context('mode.copy_on_write', True)
+    else:
+        pytest.skip('pandas without Copy-on-Write')
+
+    with copy_on_write:
+        df = _frame_with_missing_strings()
+        expected = df.copy()
+
+        result = format_dataframe(df)
+
+        assert [row['name'] for row in result['pageData']] == ['a', None, 'c']
+        pd.testing.assert_frame_equal(df, expected)
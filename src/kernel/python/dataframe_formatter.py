@@ -5,13 +5,134 @@ Provides custom MIME type output for pandas DataFrames with pagination support.
 Registers DataFrames in a global registry for subsequent operations.
 """
 
+import itertools
 import json
 import math
-from typing import Any, Dict, Optional
-from uuid import uuid4
+import secrets
+import time
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    import pandas as pd
+    from pandas.api import types as pd_types
+except ImportError:
+    np = None
+    pd = None
+    pd_types = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _held_by_user_ns(dataframe, var_name: str) -> bool:
+    """
+    Check whether a DataFrame is bound to a variable in IPython's user
+    namespace.
+
+    Args:
+        dataframe: The DataFrame to check
+        var_name: The variable name it was registered under
+
+    Returns:
+        True if the variable currently refers to the DataFrame
+    """
+    if not var_name:
+        return False
+
+    try:
+        from IPython import get_ipython
+
+        ip = get_ipython()
+        return ip is not None and ip.user_ns.get(var_name) is dataframe
+    except Exception:
+        return False
+
+
+class DFEntry:
+    """
+    A registered DataFrame together with the state cached for it.
+
+    DataFrames bound to a variable in IPython's user namespace are held by
+    weak reference, so the entry goes away once the user rebinds or deletes
+    the variable. Any other DataFrame keeps a strong reference, as nothing
+    else may keep it alive.
+
+    IPython's output cache (Out, _N) also references the results of
+    last-expression displays, so those entries live as long as the cache
+    does; eviction on rebind applies to display() and print() output.
+    """
+
+    __slots__ = (
+        '_dataframe', '_ref', '_on_collect', 'var_name', 'col_locs',
+        'col_locs_columns', 'metadata_cache', 'metadata_key', 'metadata_dirty', 'registered_at'
+    )
+
+    # Keys available through dict-style access
+    _KEYS = (
+        'dataframe', 'var_name', 'col_locs', 'col_locs_columns', 'metadata_cache',
+        'metadata_key', 'metadata_dirty', 'registered_at'
+    )
+
+    def __init__(self, dataframe, var_name: str = '', on_collect=None):
+        self._ref = None
+        self._on_collect = on_collect
+        self.var_name = var_name
+        self.dataframe = dataframe
+        self.col_locs: Optional[Dict[Any, int]] = None
+        self.col_locs_columns = None
+        self.metadata_cache: Optional[List[Dict[str, Any]]] = None
+        self.metadata_key: Optional[Tuple[Any, List[Any]]] = None
+        self.metadata_dirty = True
+        self.registered_at = time.time()
+
+    @property
+    def dataframe(self):
+        """
+        The registered DataFrame, or None if it has been garbage collected.
+        """
+        if self._ref is not None:
+            return self._ref()
+        return self._dataframe
+
+    @dataframe.setter
+    def dataframe(self, dataframe) -> None:
+        if self._on_collect is not None and _held_by_user_ns(dataframe, self.var_name):
+            try:
+                self._ref = weakref.ref(dataframe, self._on_collect)
+                self._dataframe = None
+                return
+            except TypeError:
+                pass
+        self._ref = None
+        self._dataframe = dataframe
+
+    def __getitem__(self, key: str) -> Any:
+        """
+        Support dict-style reads from code written against dict entries.
+        """
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Dict-style get(), returning default for unknown keys.
+        """
+        if key not in self._KEYS:
+            return default
+        return getattr(self, key)
+
 
 # Global registry to store DataFrame references by ID
-__promptbook_dataframes__: Dict[str, Dict[str, Any]] = {}
+__promptbook_dataframes__: Dict[str, DFEntry] = {}
+
+# Sequence number for registry IDs
+_id_counter = itertools.count()
 
 # Custom MIME type for DataFrame detection
 MIME_TYPE = 'application/vnd.promptbook.dataframe+json'
@@ -19,6 +140,51 @@ MIME_TYPE = 'application/vnd.promptbook.dataframe+json'
 # Default pagination size
 DEFAULT_PAGE_SIZE = 25
 
+# Attribute used to remember a DataFrame's variable name between displays
+_VAR_NAME_ATTR = '_promptbook_var_name'
+
+# Reverse index of the user namespace (id(value) -> name), rebuilt whenever
+# the namespace changes size
+_user_ns_index: Dict[str, Any] = {'size': -1, 'names': {}}
+
+
+def to_json(result: Dict[str, Any]) -> str:
+    """
+    Serialize a result dict to a JSON string.
+
+    Uses orjson when it is installed, falling back to the standard library.
+
+    Args:
+        result: A JSON-serializable dict
+
+    Returns:
+        The JSON string
+    """
+    if orjson is not None:
+        # Column names are not always strings, which orjson rejects by default
+        return orjson.dumps(
+            result,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode()
+    return json.dumps(result)
+
+
+# Exact dtype names for the common cases, checked before the substring rules
+_DTYPE_NAMES = {
+    'int64': 'int64',
+    'Int64': 'int64',
+    'float64': 'float64',
+    'Float64': 'float64',
+    'bool': 'bool',
+    'boolean': 'bool',
+    'datetime64[ns]': 'datetime64',
+    'category': 'category',
+    'string': 'string',
+    'string[python]': 'string',
+    'string[pyarrow]': 'string',
+    'object': 'object',
+}
+
 
 def get_column_dtype(dtype) -> str:
     """
@@ -30,36 +196,177 @@ def get_column_dtype(dtype) -> str:
     Returns:
         One of: 'int64', 'float64', 'bool', 'datetime64', 'category', 'string', 'object'
     """
-    dtype_str = str(dtype)
+    return _standardize_dtype_name(str(dtype))
+
+
+@lru_cache(maxsize=64)
+def _standardize_dtype_name(dtype_str: str) -> str:
+    """
+    Map a dtype name to our standardized type string.
+
+    Results are cached by name, since a session only sees a handful of dtypes.
+
+    Args:
+        dtype_str: The string form of a pandas dtype
+
+    Returns:
+        The standardized type string
+    """
+    standardized = _DTYPE_NAMES.get(dtype_str)
+    if standardized is not None:
+        return standardized
+
+    lowered = dtype_str.lower()
 
     # Integer types
-    if 'int' in dtype_str.lower():
+    if 'int' in lowered:
         return 'int64'
 
     # Float types
-    if 'float' in dtype_str.lower():
+    if 'float' in lowered:
         return 'float64'
 
-    # Boolean type
-    if dtype_str == 'bool' or dtype_str == 'boolean':
-        return 'bool'
-
     # Datetime types
-    if 'datetime' in dtype_str.lower() or 'timestamp' in dtype_str.lower():
+    if 'datetime' in lowered or 'timestamp' in lowered:
         return 'datetime64'
 
-    # Category type
-    if dtype_str == 'category':
-        return 'category'
-
-    # String types (pandas 1.0+ StringDtype)
-    if dtype_str == 'string' or dtype_str == 'string[python]' or dtype_str == 'string[pyarrow]':
-        return 'string'
-
     # Default to object for everything else
     return 'object'
 
 
+# Inferred types of object arrays whose values are already JSON-native
+_NATIVE_INFERRED_TYPES = frozenset({'string', 'empty'})
+
+# Extension arrays convert to native Python scalars, so more types qualify
+_NATIVE_EXTENSION_INFERRED_TYPES = _NATIVE_INFERRED_TYPES | {
+    'integer', 'floating', 'mixed-integer-float', 'boolean'
+}
+
+
+def _to_json_value(val) -> Any:
+    """
+    Convert a single value to a JSON-serializable Python value.
+
+    Args:
+        val: A cell value
+
+    Returns:
+        None for missing values, ISO strings for datetimes, native Python
+        scalars for numpy types, otherwise the value unchanged
+    """
+    # Handle NaN/None
+    if pd.isna(val):
+        return None
+    # Handle datetime
+    if hasattr(val, 'isoformat'):
+        return val.isoformat()
+    # Handle numpy types
+    if hasattr(val, 'item'):
+        return val.item()
+    return val
+
+
+def _column_values(series) -> List[Any]:
+    """
+    Convert a column to a list of JSON-serializable values.
+
+    The conversion is chosen once from the column dtype and applied to the
+    whole column, so per-value checks only run for mixed object columns.
+
+    Args:
+        series: A pandas Series
+
+    Returns:
+        List of values, with None in place of missing values
+    """
+    dtype = series.dtype
+
+    if isinstance(dtype, np.dtype):
+        values = series.to_numpy()
+        native_types = _NATIVE_INFERRED_TYPES
+    elif pd_types.is_datetime64_any_dtype(dtype):
+        # Timezone-aware datetimes
+        return series.map(lambda ts: ts.isoformat(), na_action='ignore').where(
+            series.notna(), None
+        ).tolist()
+    else:
+        values = series.to_numpy(dtype=object)
+        native_types = _NATIVE_EXTENSION_INFERRED_TYPES
+
+    # numpy ints and bools cannot hold NaN and tolist() yields native scalars
+    if values.dtype.kind in 'iub':
+        return values.tolist()
+
+    missing = series.isna().to_numpy()
+
+    if values.dtype.kind == 'M':
+        # Formatting at second resolution matches isoformat() unless some
+        # value has a fractional part
+        seconds = values.astype('datetime64[s]')
+        if (seconds == values)[~missing].all():
+            values = np.datetime_as_string(seconds, unit='s').astype(object)
+        else:
+            return [_to_json_value(val) for val in series.tolist()]
+    elif values.dtype.kind == 'm':
+        return [_to_json_value(val) for val in series.tolist()]
+    elif values.dtype.kind == 'O':
+        if pd_types.infer_dtype(values, skipna=True) not in native_types:
+            return [_to_json_value(val) for val in values.tolist()]
+
+    if not missing.any():
+        return values.tolist()
+
+    # to_numpy() can return a view of the DataFrame's own (possibly
+    # read-only) data, so build a new array rather than masking in place
+    return np.where(missing, None, values).tolist()
+
+
+def _record_columns(
+    page_df,
+    index_key: Optional[str] = None
+) -> Tuple[List[Any], List[List[Any]]]:
+    """
+    Convert a slice of a DataFrame to record keys and per-column values.
+
+    Args:
+        page_df: A pandas DataFrame (usually a single page)
+        index_key: If given, include each row's index label under this key
+
+    Returns:
+        Tuple of the record keys and the converted values of each column
+    """
+    keys = list(page_df.columns)
+    columns = [_column_values(series) for _, series in page_df.items()]
+
+    if index_key is not None:
+        keys.insert(0, index_key)
+        columns.insert(0, _column_values(page_df.index.to_series()))
+
+    return keys, columns
+
+
+def dataframe_to_records(
+    page_df,
+    index_key: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Convert a slice of a DataFrame to a list of JSON-serializable row dicts.
+
+    Args:
+        page_df: A pandas DataFrame (usually a single page)
+        index_key: If given, include each row's index label under this key
+
+    Returns:
+        List of row dicts keyed by column name
+    """
+    # Nothing to convert for an empty page
+    if len(page_df) == 0:
+        return []
+
+    keys, columns = _record_columns(page_df, index_key)
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
 def register_dataframe(df, var_name: str = '') -> str:
     """
     Register a DataFrame in the global registry.
@@ -69,16 +376,36 @@ def register_dataframe(df, var_name: str = '') -> str:
         var_name: Optional variable name for display
 
     Returns:
-        A unique identifier (first 8 chars of uuid4)
+        A unique identifier: a hex sequence number followed by a random byte,
+        so IDs from a previous kernel session are unlikely to be reused
     """
-    df_id = str(uuid4())[:8]
-    __promptbook_dataframes__[df_id] = {
-        'dataframe': df,
-        'var_name': var_name
-    }
+    df_id = f'{next(_id_counter):06x}{secrets.token_hex(1)}'
+    __promptbook_dataframes__[df_id] = DFEntry(df, var_name, _make_evict_callback(df_id))
     return df_id
 
 
+def _make_evict_callback(df_id: str):
+    """
+    Create the weakref callback that removes an entry once its DataFrame is
+    garbage collected.
+
+    The callback only captures the ID, so it does not keep the entry alive.
+
+    Args:
+        df_id: The DataFrame identifier
+
+    Returns:
+        A callback taking the dead weak reference
+    """
+    def evict(ref) -> None:
+        entry = __promptbook_dataframes__.get(df_id)
+        # A mutation may have replaced the DataFrame since this ref was made
+        if entry is not None and entry._ref is ref:
+            del __promptbook_dataframes__[df_id]
+
+    return evict
+
+
 def get_dataframe(df_id: str) -> Optional[Any]:
     """
     Retrieve a DataFrame from the registry by ID.
@@ -90,8 +417,8 @@ def get_dataframe(df_id: str) -> Optional[Any]:
         The pandas DataFrame or None if not found
     """
     entry = __promptbook_dataframes__.get(df_id)
-    if entry:
-        return entry['dataframe']
+    if entry is not None:
+        return entry.dataframe
     return None
 
 
@@ -106,11 +433,108 @@ def get_dataframe_var_name(df_id: str) -> str:
         The variable name or empty string if not found
     """
     entry = __promptbook_dataframes__.get(df_id)
-    if entry:
-        return entry.get('var_name', '')
+    if entry is not None:
+        return entry.var_name
     return ''
 
 
+def build_column_metadata(df) -> List[Dict[str, Any]]:
+    """
+    Build the column definitions for a DataFrame.
+
+    Args:
+        df: A pandas DataFrame
+
+    Returns:
+        List of dicts with name, dtype and nullable for each column
+    """
+    columns = []
+    for col, series in df.items():
+        dtype = series.dtype
+
+        # numpy ints and bools cannot hold missing values, so skip the scan
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iub':
+            nullable = False
+        else:
+            nullable = bool(series.hasnans)
+
+        columns.append({
+            'name': str(col),
+            'dtype': get_column_dtype(dtype),
+            'nullable': nullable
+        })
+
+    return columns
+
+
+def get_column_metadata(df_id: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the column definitions for a registered DataFrame.
+
+    The result is cached on the registry entry. It is recomputed after an
+    operation has marked it dirty, or when the columns Index or the dtypes
+    have changed, which catches columns added, removed, renamed or
+    converted in user code. In-place value writes that keep the dtype (for
+    example a NaN written into a float column) are not detected, so
+    nullable can be stale until the next operation on the DataFrame.
+
+    Args:
+        df_id: The DataFrame identifier
+
+    Returns:
+        List of column dicts or None if not found
+    """
+    entry = __promptbook_dataframes__.get(df_id)
+    if entry is None:
+        return None
+
+    df = entry.dataframe
+    key = entry.metadata_key
+    dtypes = list(df.dtypes)
+    if entry.metadata_dirty or key is None or key[0] is not df.columns or key[1] != dtypes:
+        entry.metadata_cache = build_column_metadata(df)
+        entry.metadata_key = (df.columns, dtypes)
+        entry.metadata_dirty = False
+    return entry.metadata_cache
+
+
+def _paginate(df, page: int, page_size: int) -> Tuple[Any, Dict[str, int]]:
+    """
+    Select one page of a DataFrame.
+
+    Args:
+        df: A pandas DataFrame
+        page: Page number (0-indexed), clamped to the valid range
+        page_size: Number of rows per page
+
+    Returns:
+        Tuple of the page slice and the pagination dict
+    """
+    # Get total rows
+    total_rows = len(df)
+    total_pages = max(1, math.ceil(total_rows / page_size))
+
+    # Ensure page is valid
+    page = max(0, min(page, total_pages - 1))
+
+    # Calculate slice indices
+    start_idx = page * page_size
+    end_idx = min(start_idx + page_size, total_rows)
+
+    # A page covering the whole DataFrame needs no slice
+    if start_idx == 0 and end_idx >= total_rows:
+        page_df = df
+    else:
+        page_df = df.iloc[start_idx:end_idx]
+
+    return page_df, {
+        'page': page,
+        'pageSize': page_size,
+        'totalRows': total_rows,
+        'totalPages': total_pages
+    }
+
+
 def format_dataframe(
     df,
     var_name: str = '',
@@ -129,68 +553,94 @@ def format_dataframe(
     Returns:
         Dict with dfId, variableName, columns, totalRows, pageData, pagination
     """
-    import pandas as pd
-
     # Register the DataFrame
     df_id = register_dataframe(df, var_name)
 
-    # Get total rows
-    total_rows = len(df)
-    total_pages = max(1, math.ceil(total_rows / page_size))
-
-    # Ensure page is valid
-    page = max(0, min(page, total_pages - 1))
-
-    # Calculate slice indices
-    start_idx = page * page_size
-    end_idx = min(start_idx + page_size, total_rows)
-
     # Get page data
-    page_df = df.iloc[start_idx:end_idx]
+    page_df, pagination = _paginate(df, page, page_size)
 
     # Convert to list of dicts, handling special types
-    page_data = []
-    for _, row in page_df.iterrows():
-        row_dict = {}
-        for col in df.columns:
-            val = row[col]
-            # Handle NaN/None
-            if pd.isna(val):
-                row_dict[col] = None
-            # Handle datetime
-            elif hasattr(val, 'isoformat'):
-                row_dict[col] = val.isoformat()
-            # Handle numpy types
-            elif hasattr(val, 'item'):
-                row_dict[col] = val.item()
-            else:
-                row_dict[col] = val
-        page_data.append(row_dict)
+    page_data = dataframe_to_records(page_df)
 
     # Build column metadata
-    columns = []
-    for col in df.columns:
-        columns.append({
-            'name': str(col),
-            'dtype': get_column_dtype(df[col].dtype),
-            'nullable': bool(df[col].isna().any())
-        })
+    columns = get_column_metadata(df_id)
 
     return {
         'dfId': df_id,
         'variableName': var_name,
         'columns': columns,
-        'totalRows': total_rows,
+        'totalRows': pagination['totalRows'],
         'pageData': page_data,
-        'pagination': {
-            'page': page,
-            'pageSize': page_size,
-            'totalRows': total_rows,
-            'totalPages': total_pages
-        }
+        'pagination': pagination
     }
 
 
+def _rebuild_user_ns_index(user_ns: Dict[str, Any]) -> None:
+    """
+    Rebuild the reverse index of the user namespace.
+
+    Args:
+        user_ns: IPython's user namespace
+    """
+    names: Dict[int, str] = {}
+    for name, value in user_ns.items():
+        # Skip private/magic names
+        if name.startswith('_'):
+            continue
+        # Keep the first name bound to each object
+        names.setdefault(id(value), name)
+
+    _user_ns_index['size'] = len(user_ns)
+    _user_ns_index['names'] = names
+
+
+def find_var_name(df) -> str:
+    """
+    Find the variable name for a DataFrame in IPython's user namespace.
+
+    The name found is remembered on the DataFrame, so displaying the same
+    object again only needs one namespace lookup to confirm it.
+
+    Args:
+        df: The DataFrame to find
+
+    Returns:
+        The variable name or empty string
+    """
+    try:
+        from IPython import get_ipython
+
+        ip = get_ipython()
+        if ip is None:
+            return ''
+
+        user_ns = ip.user_ns
+
+        # Check the name remembered from a previous display
+        cached = getattr(df, _VAR_NAME_ATTR, '')
+        if cached and user_ns.get(cached) is df:
+            return cached
+
+        rebuilt = False
+        if len(user_ns) != _user_ns_index['size']:
+            _rebuild_user_ns_index(user_ns)
+            rebuilt = True
+
+        name = _user_ns_index['names'].get(id(df), '')
+        if user_ns.get(name) is not df and not rebuilt:
+            # A name may have been rebound without changing the namespace size
+            _rebuild_user_ns_index(user_ns)
+            name = _user_ns_index['names'].get(id(df), '')
+
+        if name and user_ns.get(name) is df:
+            setattr(df, _VAR_NAME_ATTR, name)
+            return name
+    except Exception:
+        pass
+
+    return ''
+
+
 class DataFrameFormatter:
     """
     IPython formatter for pandas DataFrames.
@@ -201,27 +651,24 @@ class DataFrameFormatter:
     format_type = MIME_TYPE
     print_method = '_repr_promptbook_df_'
 
-    def __call__(self, obj) -> Optional[str]:
+    def __call__(self, obj) -> Optional[Dict[str, Any]]:
         """
         Format the object if it's a DataFrame.
 
+        The dict is returned as-is: the kernel serializes display data once
+        when sending it, so encoding it here would only add a second pass.
+
         Args:
             obj: The object to format
 
         Returns:
-            JSON string with DataFrame metadata or None
+            Dict with DataFrame metadata or None
         """
-        try:
-            import pandas as pd
+        if pd is None or not isinstance(obj, pd.DataFrame):
+            return None
 
-            if isinstance(obj, pd.DataFrame):
-                var_name = self._find_var_name(obj)
-                result = format_dataframe(obj, var_name)
-                return json.dumps(result)
-        except ImportError:
-            pass
-
-        return None
+        var_name = self._find_var_name(obj)
+        return format_dataframe(obj, var_name)
 
     def _find_var_name(self, df) -> str:
         """
@@ -233,25 +680,7 @@ class DataFrameFormatter:
         Returns:
             The variable name or empty string
         """
-        try:
-            from IPython import get_ipython
-
-            ip = get_ipython()
-            if ip is None:
-                return ''
-
-            # Search user namespace for this DataFrame
-            for name, value in ip.user_ns.items():
-                # Skip private/magic names
-                if name.startswith('_'):
-                    continue
-                # Check if it's the same object
-                if value is df:
-                    return name
-        except Exception:
-            pass
-
-        return ''
+        return find_var_name(df)
 
 
 def install_formatter() -> None:
@@ -275,53 +704,34 @@ def install_formatter() -> None:
             formatter.formatters[MIME_TYPE] = DataFrameFormatter()
 
         # Also register for pandas DataFrames specifically
-        try:
-            import pandas as pd
-
+        if pd is not None:
             # Add a method to DataFrame class for our format
             def _repr_promptbook_df_(self):
-                var_name = ''
-                try:
-                    # Try to find variable name
-                    ip = get_ipython()
-                    if ip:
-                        for name, value in ip.user_ns.items():
-                            if not name.startswith('_') and value is self:
-                                var_name = name
-                                break
-                except Exception:
-                    pass
-
+                var_name = find_var_name(self)
                 result = format_dataframe(self, var_name)
-                return json.dumps(result)
+                return to_json(result)
 
             pd.DataFrame._repr_promptbook_df_ = _repr_promptbook_df_
 
             # Patch print() to use display() for DataFrames
             # This ensures print(df) shows our interactive viewer
             _original_print = builtins.print
+            _DataFrame = pd.DataFrame
 
             def _promptbook_print(*args, **kwargs):
                 """
                 Patched print that uses display() for DataFrames.
                 """
-                # Check if any argument is a DataFrame
-                has_dataframe = False
+                # Normal print unless an argument is a DataFrame
+                if not any(isinstance(arg, _DataFrame) for arg in args):
+                    return _original_print(*args, **kwargs)
+
+                # If printing DataFrames, use display() for each
                 for arg in args:
-                    if isinstance(arg, pd.DataFrame):
-                        has_dataframe = True
-                        break
-
-                if has_dataframe:
-                    # If printing DataFrames, use display() for each
-                    for arg in args:
-                        if isinstance(arg, pd.DataFrame):
-                            display(arg)
-                        else:
-                            _original_print(arg, **kwargs)
-                else:
-                    # Normal print for everything else
-                    _original_print(*args, **kwargs)
+                    if isinstance(arg, _DataFrame):
+                        display(arg)
+                    else:
+                        _original_print(arg, **kwargs)
 
             # Install the patched print in builtins and user namespace
             builtins.print = _promptbook_print
@@ -331,9 +741,6 @@ def install_formatter() -> None:
             # Store original for uninstall
             builtins._promptbook_original_print = _original_print
 
-        except ImportError:
-            pass
-
     except ImportError:
         pass
 
@@ -363,13 +770,8 @@ def uninstall_formatter() -> None:
                 ip.user_ns['print'] = builtins.print
 
         # Remove the method from DataFrame class
-        try:
-            import pandas as pd
-
-            if hasattr(pd.DataFrame, '_repr_promptbook_df_'):
-                delattr(pd.DataFrame, '_repr_promptbook_df_')
-        except (ImportError, AttributeError):
-            pass
+        if pd is not None and hasattr(pd.DataFrame, '_repr_promptbook_df_'):
+            delattr(pd.DataFrame, '_repr_promptbook_df_')
 
     except ImportError:
         pass
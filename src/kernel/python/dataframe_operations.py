@@ -6,24 +6,29 @@ row/column operations, and type conversions.
 """
 
 import json
-import math
+import numbers
 import time
 from typing import Any, Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 from IPython import get_ipython
 
 from .dataframe_formatter import (
     __promptbook_dataframes__,
+    DFEntry,
     get_dataframe,
     get_dataframe_var_name,
     format_dataframe,
+    dataframe_to_records,
     DEFAULT_PAGE_SIZE,
-    get_column_dtype
+    get_column_dtype,
+    get_column_metadata,
+    _paginate
 )
 
 
-def _get_entry(df_id: str) -> Optional[Dict[str, Any]]:
+def _get_entry(df_id: str) -> Optional[DFEntry]:
     """
     Get the registry entry for a DataFrame.
 
@@ -56,30 +61,123 @@ def _update_user_namespace(df_id: str, df: pd.DataFrame) -> None:
         pass
 
 
-def _build_metadata(df: pd.DataFrame) -> Dict[str, Any]:
+def _invalidate_metadata(entry: DFEntry) -> None:
+    """
+    Mark the cached column metadata as stale after the DataFrame changed.
+
+    The metadata is recomputed the next time it is requested.
+
+    Args:
+        entry: The registry entry
+    """
+    entry.metadata_dirty = True
+
+
+def _invalidate_columns(entry: DFEntry) -> None:
+    """
+    Drop the cached column positions after the column set changed.
+
+    Args:
+        entry: The registry entry
+    """
+    entry.col_locs = None
+    entry.col_locs_columns = None
+
+
+def _get_col_loc(entry: DFEntry, column: Any) -> Any:
+    """
+    Get the position of a column, caching the column to position mapping.
+
+    The mapping is tied to the columns Index it was built from. pandas
+    creates a new Index whenever columns are inserted, deleted or renamed,
+    including from user code, so a different Index triggers a rebuild.
+    The mapping is only built for unique column labels; duplicate labels
+    fall back to Index.get_loc().
+
+    Args:
+        entry: The registry entry
+        column: The column name
+
+    Returns:
+        The column position
+    """
+    columns = entry.dataframe.columns
+    if entry.col_locs is None or entry.col_locs_columns is not columns:
+        if columns.is_unique:
+            entry.col_locs = {col: pos for pos, col in enumerate(columns)}
+        else:
+            entry.col_locs = {}
+        entry.col_locs_columns = columns
+
+    col_loc = entry.col_locs.get(column)
+    if col_loc is None:
+        return columns.get_loc(column)
+    return col_loc
+
+
+def _build_metadata(df_id: str) -> Dict[str, Any]:
     """
     Build metadata for a DataFrame response.
 
     Args:
-        df: The DataFrame
+        df_id: The DataFrame identifier
 
     Returns:
         Dict with columns and totalRows
     """
-    columns = []
-    for col in df.columns:
-        columns.append({
-            'name': str(col),
-            'dtype': get_column_dtype(df[col].dtype),
-            'nullable': bool(df[col].isna().any())
-        })
-
     return {
-        'columns': columns,
-        'totalRows': len(df)
+        'columns': get_column_metadata(df_id),
+        'totalRows': len(get_dataframe(df_id))
     }
 
 
+def _success_response(df_id: str, include_metadata: bool) -> Dict[str, Any]:
+    """
+    Build the response for a successful operation.
+
+    Args:
+        df_id: The DataFrame identifier
+        include_metadata: Whether to include the updated metadata
+
+    Returns:
+        Dict with success status and, if requested, metadata
+    """
+    if include_metadata:
+        return {'success': True, 'metadata': _build_metadata(df_id)}
+    return {'success': True}
+
+
+# String values treated as True when converting to bool
+_TRUE_STRINGS = ('true', '1', 'yes')
+
+
+def _to_bool(value: Any) -> bool:
+    """
+    Convert a value to a boolean, accepting common string representations.
+
+    Args:
+        value: The value to convert
+
+    Returns:
+        The boolean value
+    """
+    if isinstance(value, str):
+        return value.lower() in _TRUE_STRINGS
+    return bool(value)
+
+
+# Scalar converters by dtype string; other dtypes keep the value as-is
+_CONVERTERS = {
+    'int64': lambda value: int(float(value)),
+    'float64': float,
+    'bool': _to_bool,
+    'datetime64': pd.to_datetime,
+    'string': str,
+    'object': str,
+    'category': str,
+}
+
+
 def _convert_value(value: Any, dtype: str) -> Any:
     """
     Convert a value to the appropriate type for a column.
@@ -94,22 +192,50 @@ def _convert_value(value: Any, dtype: str) -> Any:
     if value is None or (isinstance(value, float) and pd.isna(value)):
         return None
 
+    converter = _CONVERTERS.get(dtype)
+    if converter is None:
+        return value
+    return converter(value)
+
+
+def _convert_values(values: List[Any], dtype: str, na_value: Any = None) -> pd.Series:
+    """
+    Convert a list of values for a column in one vectorized pass.
+
+    Follows the same rules as _convert_value(), except that integers come
+    back as whole float64 values so that missing entries can be NaN.
+
+    Args:
+        values: The values to convert
+        dtype: The target dtype string
+        na_value: The value to use for missing entries
+
+    Returns:
+        Series of converted values
+    """
+    series = pd.Series(values, dtype=object)
+    missing = series.isna()
+
     if dtype == 'int64':
-        return int(float(value))
+        converted = np.trunc(pd.to_numeric(series, errors='raise').astype('float64'))
     elif dtype == 'float64':
-        return float(value)
+        converted = pd.to_numeric(series, errors='raise').astype('float64')
     elif dtype == 'bool':
-        if isinstance(value, str):
-            return value.lower() in ('true', '1', 'yes')
-        return bool(value)
+        is_str = series.map(lambda value: isinstance(value, str)).astype(bool)
+        from_str = series.where(is_str, '').str.lower().isin(_TRUE_STRINGS)
+        converted = from_str.where(is_str, series.astype(bool))
     elif dtype == 'datetime64':
-        return pd.to_datetime(value)
-    elif dtype == 'string' or dtype == 'object':
-        return str(value)
-    elif dtype == 'category':
-        return str(value)
+        try:
+            converted = pd.to_datetime(series)
+        except (TypeError, ValueError):
+            # Values in different formats cannot be parsed as one array
+            converted = pd.Series([_convert_value(value, dtype) for value in values])
+    elif dtype in ('string', 'object', 'category'):
+        converted = series.astype(str)
     else:
-        return value
+        converted = series
+
+    return converted.where(~missing, na_value)
 
 
 def get_page(
@@ -126,50 +252,46 @@ def get_page(
         page_size: Number of rows per page
 
     Returns:
-        Dict with success, data, and pagination info
+        Dict with success, data, metadata, and pagination info
     """
     df = get_dataframe(df_id)
     if df is None:
         return {'success': False, 'error': f'DataFrame not found: {df_id}'}
 
-    total_rows = len(df)
-    total_pages = max(1, math.ceil(total_rows / page_size))
-
-    # Ensure page is valid
-    page = max(0, min(page, total_pages - 1))
-
-    # Calculate slice indices
-    start_idx = page * page_size
-    end_idx = min(start_idx + page_size, total_rows)
-
     # Get page data
-    page_df = df.iloc[start_idx:end_idx]
+    page_df, pagination = _paginate(df, page, page_size)
 
     # Convert to list of dicts
-    page_data = []
-    for idx, row in page_df.iterrows():
-        row_dict = {'__index__': idx}
-        for col in df.columns:
-            val = row[col]
-            if pd.isna(val):
-                row_dict[col] = None
-            elif hasattr(val, 'isoformat'):
-                row_dict[col] = val.isoformat()
-            elif hasattr(val, 'item'):
-                row_dict[col] = val.item()
-            else:
-                row_dict[col] = val
-        page_data.append(row_dict)
+    page_data = dataframe_to_records(page_df, index_key='__index__')
 
     return {
         'success': True,
         'data': page_data,
-        'pagination': {
-            'page': page,
-            'pageSize': page_size,
-            'totalRows': total_rows,
-            'totalPages': total_pages
-        }
+        'metadata': _build_metadata(df_id),
+        'pagination': pagination
+    }
+
+
+def get_metadata(df_id: str) -> Dict[str, Any]:
+    """
+    Get the current metadata for a DataFrame.
+
+    Metadata is recomputed if an operation changed the DataFrame, or its
+    columns or dtypes changed, since it was last built. Nullable flags can
+    lag behind in-place value writes made in user code.
+
+    Args:
+        df_id: The DataFrame identifier
+
+    Returns:
+        Dict with success status and metadata
+    """
+    if _get_entry(df_id) is None:
+        return {'success': False, 'error': f'DataFrame not found: {df_id}'}
+
+    return {
+        'success': True,
+        'metadata': _build_metadata(df_id)
     }
 
 
@@ -177,25 +299,30 @@ def edit_cell(
     df_id: str,
     row_index: int,
     column: str,
-    value: Any
+    value: Any,
+    include_metadata: bool = False
 ) -> Dict[str, Any]:
     """
     Edit a single cell in a DataFrame.
 
+    Metadata is not returned by default, since the viewer only needs to know
+    whether the edit succeeded; use get_metadata() to fetch it when needed.
+
     Args:
         df_id: The DataFrame identifier
         row_index: The row index to edit
         column: The column name
         value: The new value
+        include_metadata: Whether to include the updated metadata
 
     Returns:
-        Dict with success status and metadata
+        Dict with success status and, if requested, metadata
     """
     entry = _get_entry(df_id)
     if entry is None:
         return {'success': False, 'error': f'DataFrame not found: {df_id}'}
 
-    df = entry['dataframe']
+    df = entry.dataframe
 
     # Validate row index
     if row_index < 0 or row_index >= len(df):
@@ -210,26 +337,117 @@ def edit_cell(
         dtype = get_column_dtype(df[column].dtype)
         converted_value = _convert_value(value, dtype)
 
-        # Update the cell
-        df.iloc[row_index, df.columns.get_loc(column)] = converted_value
+        # Update the cell through the scalar fast path
+        df.iat[row_index, _get_col_loc(entry, column)] = converted_value
+
+        # Update user namespace
+        _update_user_namespace(df_id, df)
 
         # Update registry
-        entry['dataframe'] = df
+        entry.dataframe = df
+        _invalidate_metadata(entry)
+
+        return _success_response(df_id, include_metadata)
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+def batch_edit_cells(
+    df_id: str,
+    edits: List[Dict[str, Any]],
+    include_metadata: bool = False
+) -> Dict[str, Any]:
+    """
+    Edit several cells in a DataFrame at once.
+
+    Edits are grouped by column and applied to a copy of each edited
+    column. The copies replace the original columns only once every column
+    has accepted its values, so a bad edit leaves the DataFrame unchanged.
+
+    Args:
+        df_id: The DataFrame identifier
+        edits: List of dicts with rowIndex, column and value
+        include_metadata: Whether to include the updated metadata
+
+    Returns:
+        Dict with success status and, if requested, metadata
+    """
+    entry = _get_entry(df_id)
+    if entry is None:
+        return {'success': False, 'error': f'DataFrame not found: {df_id}'}
+
+    df = entry.dataframe
+
+    if not isinstance(edits, list):
+        return {'success': False, 'error': 'Edits must be a list'}
+
+    try:
+        # Group edits by column, validating as we go
+        edits_by_column: Dict[Any, Dict[str, List[Any]]] = {}
+        for edit in edits:
+            if not isinstance(edit, dict):
+                return {'success': False, 'error': f'Invalid edit: {edit!r}'}
+
+            row_index = edit.get('rowIndex')
+            column = edit.get('column')
+
+            if not isinstance(row_index, numbers.Integral) or isinstance(row_index, bool):
+                return {'success': False, 'error': f'Invalid row index: {row_index!r}'}
+            if row_index < 0 or row_index >= len(df):
+                return {'success': False, 'error': f'Row index out of range: {row_index}'}
+            if column not in df.columns:
+                return {'success': False, 'error': f'Column not found: {column}'}
+
+            group = edits_by_column.setdefault(column, {'rows': [], 'values': []})
+            group['rows'].append(int(row_index))
+            group['values'].append(edit.get('value'))
+
+        # Convert and apply every value on column copies before touching
+        # the DataFrame, so values a column rejects (e.g. a new category)
+        # fail here
+        updates = []
+        for column, group in edits_by_column.items():
+            col_dtype = df[column].dtype
+            dtype = get_column_dtype(col_dtype)
+
+            # Use the column's own missing value so that None does not turn
+            # the assigned values into an object array
+            if col_dtype.kind in 'mM':
+                na_value = pd.NaT
+            elif col_dtype.kind in 'iufc':
+                na_value = np.nan
+            else:
+                na_value = None
+
+            values = _convert_values(group['values'], dtype, na_value)
+            col_loc = _get_col_loc(entry, column)
+            staged = df.iloc[:, col_loc].copy()
+            staged.iloc[group['rows']] = values.to_numpy()
+            updates.append((col_loc, staged))
+
+        # Swap in the edited columns
+        try:
+            for col_loc, staged in updates:
+                df.isetitem(col_loc, staged)
+        finally:
+            if updates:
+                _invalidate_metadata(entry)
 
         # Update user namespace
         _update_user_namespace(df_id, df)
 
-        return {
-            'success': True,
-            'metadata': _build_metadata(df)
-        }
+        # Update registry
+        entry.dataframe = df
+
+        return _success_response(df_id, include_metadata)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
 
 def add_row(
     df_id: str,
-    row_data: Optional[Dict[str, Any]] = None
+    row_data: Optional[Dict[str, Any]] = None,
+    include_metadata: bool = True
 ) -> Dict[str, Any]:
     """
     Add a new row to a DataFrame.
@@ -237,15 +455,16 @@ def add_row(
     Args:
         df_id: The DataFrame identifier
         row_data: Optional dict of column values (None = empty row with nulls)
+        include_metadata: Whether to include the updated metadata
 
     Returns:
-        Dict with success status and metadata
+        Dict with success status and, if requested, metadata
     """
     entry = _get_entry(df_id)
     if entry is None:
         return {'success': False, 'error': f'DataFrame not found: {df_id}'}
 
-    df = entry['dataframe']
+    df = entry.dataframe
 
     try:
         # Create new row
@@ -253,65 +472,73 @@ def add_row(
             new_row = {col: None for col in df.columns}
         else:
             new_row = {}
-            for col in df.columns:
+            for col, col_dtype in zip(df.columns, df.dtypes):
                 if col in row_data:
-                    dtype = get_column_dtype(df[col].dtype)
+                    dtype = get_column_dtype(col_dtype)
                     new_row[col] = _convert_value(row_data[col], dtype)
                 else:
                     new_row[col] = None
 
-        # Append row
-        new_df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-
-        # Update registry
-        entry['dataframe'] = new_df
+        # Append row (df.loc[len(df)] is no cheaper, pandas appends a new
+        # frame internally for enlargement)
+        new_df = pd.concat(
+            [df, pd.DataFrame([new_row], columns=df.columns)],
+            ignore_index=True
+        )
 
         # Update user namespace
         _update_user_namespace(df_id, new_df)
 
-        return {
-            'success': True,
-            'metadata': _build_metadata(new_df)
-        }
+        # Update registry
+        entry.dataframe = new_df
+        _invalidate_metadata(entry)
+
+        return _success_response(df_id, include_metadata)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
 
-def delete_row(df_id: str, row_index: int) -> Dict[str, Any]:
+def delete_row(
+    df_id: str,
+    row_index: int,
+    include_metadata: bool = True
+) -> Dict[str, Any]:
     """
     Delete a row from a DataFrame.
 
     Args:
         df_id: The DataFrame identifier
         row_index: The row index to delete
+        include_metadata: Whether to include the updated metadata
 
     Returns:
-        Dict with success status and metadata
+        Dict with success status and, if requested, metadata
     """
     entry = _get_entry(df_id)
     if entry is None:
         return {'success': False, 'error': f'DataFrame not found: {df_id}'}
 
-    df = entry['dataframe']
+    df = entry.dataframe
 
     # Validate row index
     if row_index < 0 or row_index >= len(df):
         return {'success': False, 'error': f'Row index out of range: {row_index}'}
 
     try:
-        # Delete row and reset index
-        new_df = df.drop(df.index[row_index]).reset_index(drop=True)
-
-        # Update registry
-        entry['dataframe'] = new_df
+        # Delete row by position and reset index, copying the data once
+        new_df = pd.concat(
+            [df.iloc[:row_index], df.iloc[row_index + 1:]],
+            ignore_index=True
+        )
 
         # Update user namespace
         _update_user_namespace(df_id, new_df)
 
-        return {
-            'success': True,
-            'metadata': _build_metadata(new_df)
-        }
+        # Update registry
+        entry.dataframe = new_df
+        _invalidate_metadata(entry)
+
+        return _success_response(df_id, include_metadata)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
@@ -320,7 +547,8 @@ def add_column(
     df_id: str,
     column: str,
     dtype: str = 'object',
-    default_value: Any = None
+    default_value: Any = None,
+    include_metadata: bool = True
 ) -> Dict[str, Any]:
     """
     Add a new column to a DataFrame.
@@ -330,15 +558,16 @@ def add_column(
         column: The column name
         dtype: The column dtype (int64, float64, string, bool, datetime64, category)
         default_value: Default value for all rows
+        include_metadata: Whether to include the updated metadata
 
     Returns:
-        Dict with success status and metadata
+        Dict with success status and, if requested, metadata
     """
     entry = _get_entry(df_id)
     if entry is None:
         return {'success': False, 'error': f'DataFrame not found: {df_id}'}
 
-    df = entry['dataframe']
+    df = entry.dataframe
 
     # Check if column already exists
     if column in df.columns:
@@ -366,36 +595,40 @@ def add_column(
         elif dtype == 'string':
             df[column] = df[column].astype('string')
 
-        # Update registry
-        entry['dataframe'] = df
-
         # Update user namespace
         _update_user_namespace(df_id, df)
 
-        return {
-            'success': True,
-            'metadata': _build_metadata(df)
-        }
+        # Update registry
+        entry.dataframe = df
+        _invalidate_metadata(entry)
+        _invalidate_columns(entry)
+
+        return _success_response(df_id, include_metadata)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
 
-def delete_column(df_id: str, column: str) -> Dict[str, Any]:
+def delete_column(
+    df_id: str,
+    column: str,
+    include_metadata: bool = True
+) -> Dict[str, Any]:
     """
     Delete a column from a DataFrame.
 
     Args:
         df_id: The DataFrame identifier
         column: The column name to delete
+        include_metadata: Whether to include the updated metadata
 
     Returns:
-        Dict with success status and metadata
+        Dict with success status and, if requested, metadata
     """
     entry = _get_entry(df_id)
     if entry is None:
         return {'success': False, 'error': f'DataFrame not found: {df_id}'}
 
-    df = entry['dataframe']
+    df = entry.dataframe
 
     # Validate column
     if column not in df.columns:
@@ -405,21 +638,25 @@ def delete_column(df_id: str, column: str) -> Dict[str, Any]:
         # Delete column
         new_df = df.drop(columns=[column])
 
-        # Update registry
-        entry['dataframe'] = new_df
-
         # Update user namespace
         _update_user_namespace(df_id, new_df)
 
-        return {
-            'success': True,
-            'metadata': _build_metadata(new_df)
-        }
+        # Update registry
+        entry.dataframe = new_df
+        _invalidate_metadata(entry)
+        _invalidate_columns(entry)
+
+        return _success_response(df_id, include_metadata)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
 
-def rename_column(df_id: str, column: str, new_name: str) -> Dict[str, Any]:
+def rename_column(
+    df_id: str,
+    column: str,
+    new_name: str,
+    include_metadata: bool = True
+) -> Dict[str, Any]:
     """
     Rename a column in a DataFrame.
 
@@ -427,15 +664,16 @@ def rename_column(df_id: str, column: str, new_name: str) -> Dict[str, Any]:
         df_id: The DataFrame identifier
         column: The current column name
         new_name: The new column name
+        include_metadata: Whether to include the updated metadata
 
     Returns:
-        Dict with success status and metadata
+        Dict with success status and, if requested, metadata
     """
     entry = _get_entry(df_id)
     if entry is None:
         return {'success': False, 'error': f'DataFrame not found: {df_id}'}
 
-    df = entry['dataframe']
+    df = entry.dataframe
 
     # Validate column
     if column not in df.columns:
@@ -449,21 +687,25 @@ def rename_column(df_id: str, column: str, new_name: str) -> Dict[str, Any]:
         # Rename column
         new_df = df.rename(columns={column: new_name})
 
-        # Update registry
-        entry['dataframe'] = new_df
-
         # Update user namespace
         _update_user_namespace(df_id, new_df)
 
-        return {
-            'success': True,
-            'metadata': _build_metadata(new_df)
-        }
+        # Update registry
+        entry.dataframe = new_df
+        _invalidate_metadata(entry)
+        _invalidate_columns(entry)
+
+        return _success_response(df_id, include_metadata)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
 
-def change_column_type(df_id: str, column: str, new_type: str) -> Dict[str, Any]:
+def change_column_type(
+    df_id: str,
+    column: str,
+    new_type: str,
+    include_metadata: bool = True
+) -> Dict[str, Any]:
     """
     Convert a column to a new data type.
 
@@ -471,15 +713,16 @@ def change_column_type(df_id: str, column: str, new_type: str) -> Dict[str, Any]
         df_id: The DataFrame identifier
         column: The column name
         new_type: The new dtype (int64, float64, string, bool, datetime64, category)
+        include_metadata: Whether to include the updated metadata
 
     Returns:
-        Dict with success status and metadata
+        Dict with success status and, if requested, metadata
     """
     entry = _get_entry(df_id)
     if entry is None:
         return {'success': False, 'error': f'DataFrame not found: {df_id}'}
 
-    df = entry['dataframe']
+    df = entry.dataframe
 
     # Validate column
     if column not in df.columns:
@@ -517,16 +760,14 @@ def change_column_type(df_id: str, column: str, new_type: str) -> Dict[str, Any]
         elif new_type == 'object':
             df[column] = df[column].astype('object')
 
-        # Update registry
-        entry['dataframe'] = df
-
         # Update user namespace
         _update_user_namespace(df_id, df)
 
-        return {
-            'success': True,
-            'metadata': _build_metadata(df)
-        }
+        # Update registry
+        entry.dataframe = df
+        _invalidate_metadata(entry)
+
+        return _success_response(df_id, include_metadata)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
@@ -535,19 +776,21 @@ def cleanup_registry(max_age_minutes: int = 60) -> Dict[str, Any]:
     """
     Remove old DataFrames from the registry.
 
-    Note: This requires tracking registration time, which is not currently
-    implemented in the base formatter. For now, this clears all entries.
-
     Args:
-        max_age_minutes: Maximum age in minutes (not currently used)
+        max_age_minutes: Maximum age in minutes since registration
 
     Returns:
         Dict with removed and remaining counts
     """
-    removed = len(__promptbook_dataframes__)
-    __promptbook_dataframes__.clear()
+    cutoff = time.time() - max_age_minutes * 60
+    expired = [
+        df_id for df_id, entry in list(__promptbook_dataframes__.items())
+        if entry.registered_at <= cutoff
+    ]
+    for df_id in expired:
+        __promptbook_dataframes__.pop(df_id, None)
 
     return {
-        'removed': removed,
-        'remaining': 0
+        'removed': len(expired),
+        'remaining': len(__promptbook_dataframes__)
     }
@@ -103,6 +103,11 @@ export interface DataFramePageRequest {
 export interface DataFramePageResponse {
   success: boolean;
   data?: Record<string, unknown>[];
+  /**
+   * Column metadata, recomputed after an operation or a change of columns or
+   * dtypes; nullable can be stale after in-place value writes in user code
+   */
+  metadata?: Pick<DataFrameMetadata, 'columns' | 'totalRows'>;
   pagination?: DataFramePagination;
   error?: string;
 }
@@ -117,6 +122,14 @@ export interface DataFrameCellEditRequest {
   value: unknown;
 }
 
+/**
+ * Batch cell edit request, applied all-or-nothing with a single metadata rebuild
+ */
+export interface DataFrameBatchEditRequest {
+  dfId: string;
+  edits: Omit<DataFrameCellEditRequest, 'dfId'>[];
+}
+
 /**
  * Row operation request
  */